@@ -14,19 +14,31 @@ import os
 import traceback
 import logging
 import json
-import fitz  # PyMuPDF
-from typing import List, Any
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import tempfile
+import threading
+import time
+import importlib
+import asyncio
+import hashlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import re
+from typing import List, Any, Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter, model_validator
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_openai import ChatOpenAI
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
+from backend.json_repair import find_json_candidates, repair_json
+
+# PyMuPDF, LangChain, FAISS and the sentence-transformers stack are imported
+# lazily (see "Lazy dependencies" below) so the server can answer /status
+# while they load in the background.
+if TYPE_CHECKING:
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from langchain_community.vectorstores import FAISS
+    from langchain_openai import ChatOpenAI
+    from langchain.chains import RetrievalQA
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
@@ -47,9 +59,16 @@ if not OPENROUTER_API_KEY:
 # ─────────────────────────────────────────────────────────────────────────────
 # FastAPI setup
 # ─────────────────────────────────────────────────────────────────────────────
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load heavy dependencies in the background so /status answers immediately
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+
 app = FastAPI(
     title="PiFi RAG Backend",
     description="Upload an Annual Report PDF and ask it questions!",
+    lifespan=lifespan,
 )
 app.add_middleware(
     CORSMiddleware,
@@ -61,42 +80,244 @@ app.add_middleware(
 # ─────────────────────────────────────────────────────────────────────────────
 # Globals for our index & QA chain
 # ─────────────────────────────────────────────────────────────────────────────
-vectorstore: FAISS = None
-qa_chain: RetrievalQA = None
+vectorstore: "FAISS" = None
+qa_chain: "RetrievalQA" = None
 quiz_data: dict = None  # Will store the current quiz questions and answers
 
+# Indexed reports, keyed by a hash of their PDF bytes and ordered least to
+# most recently uploaded. The globals above always point at the most recent
+# upload; /compare works across all of these. Both are bounded (see
+# MAX_INDEXED_REPORTS / EXTRACTION_CACHE_SIZE) and guarded by _registry_lock.
+reports: "OrderedDict[str, dict]" = OrderedDict()          # report_id -> {"label", "company", "vectorstore", "qa_chain"}
+extraction_cache: "OrderedDict[tuple, Any]" = OrderedDict()  # (report_id, prompt) -> answer text or ReportFigures
+_registry_lock = threading.Lock()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Ingestion settings
+# ─────────────────────────────────────────────────────────────────────────────
+UPLOAD_SPOOL_CHUNK = 1024 * 1024   # bytes read from the upload per iteration
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+SPLIT_WINDOW = 64 * CHUNK_SIZE     # characters buffered before the splitter runs
+EMBED_BATCH_SIZE = 256             # chunks embedded & added to FAISS at a time
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+RETRIEVAL_K = 4
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Batch QA settings
+# ─────────────────────────────────────────────────────────────────────────────
+ASK_BATCH_MAX_QUESTIONS = 100
+ASK_BATCH_CONCURRENCY = 8          # LLM calls in flight per /ask/batch request
+COMPARE_CONCURRENCY = 4            # reports queried at once per /compare request
+# Oldest upload's index is dropped beyond this; 16 covers e.g. 3 peers x FY20-FY24
+MAX_INDEXED_REPORTS = int(os.getenv("MAX_INDEXED_REPORTS", "16"))
+EXTRACTION_CACHE_SIZE = 512        # cached /compare answers, least recently used dropped
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Lazy dependencies & background warm-up
+# ─────────────────────────────────────────────────────────────────────────────
+HEAVY_MODULES = (
+    "fitz",
+    "langchain.text_splitter",
+    "langchain_community.vectorstores",
+    "langchain_community.embeddings",
+    "langchain_openai",
+    "langchain.chains",
+    "langchain.prompts",
+)
+
+warmup_state = {
+    "ready": False,
+    "error": None,
+    "load_seconds": {},  # module / model name -> seconds spent loading it
+}
+
+_embeddings: "HuggingFaceEmbeddings" = None
+_embeddings_lock = threading.Lock()
+
+def get_embeddings() -> "HuggingFaceEmbeddings":
+    """Load the sentence-transformers model once and share it across uploads"""
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            _embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+        return _embeddings
+
+_llm: "ChatOpenAI" = None
+_llm_lock = threading.Lock()
+
+def get_llm() -> "ChatOpenAI":
+    """Create the OpenRouter chat model once; it is shared by every report's chain"""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            from langchain_openai import ChatOpenAI
+            _llm = ChatOpenAI(
+                model="deepseek/deepseek-chat-v3-0324:free",
+                base_url="https://openrouter.ai/api/v1",
+                api_key=OPENROUTER_API_KEY,
+                temperature=0
+            )
+        return _llm
+
+def warm_up():
+    """Import the heavy dependencies and load the embedding model ahead of the first upload"""
+    try:
+        for name in HEAVY_MODULES:
+            start = time.perf_counter()
+            importlib.import_module(name)
+            warmup_state["load_seconds"][name] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        get_embeddings()
+        warmup_state["load_seconds"][EMBEDDING_MODEL] = round(time.perf_counter() - start, 3)
+        warmup_state["ready"] = True
+        logger.info("Warm-up complete: %s", warmup_state["load_seconds"])
+    except Exception as e:
+        warmup_state["error"] = str(e)
+        logger.error("Warm-up failed: %s", e, exc_info=True)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers
 # ─────────────────────────────────────────────────────────────────────────────
-def pdf_to_text(pdf_bytes: bytes) -> str:
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    text = [page.get_text() for page in doc]
-    logger.info("Extracted text from %d pages", len(text))
-    return "\n".join(text)
+def iter_pdf_pages(pdf_path: str) -> Iterator[str]:
+    """Yield the text of each page, reading the PDF from disk one page at a time"""
+    import fitz  # PyMuPDF
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            yield page.get_text()
+        logger.info("Extracted text from %d pages", doc.page_count)
 
-def build_index_and_chain(pdf_bytes: bytes):
-    global vectorstore, qa_chain
+def iter_text_chunks(pages: Iterable[str], splitter: "RecursiveCharacterTextSplitter",
+                     window: int = SPLIT_WINDOW) -> Iterator[str]:
+    """
+    Split a stream of page texts into chunks without materialising the
+    whole document. Pages accumulate into a bounded buffer; once it reaches
+    `window` characters it is split and every chunk but the last is emitted.
+    The last chunk is carried over so text crossing a page break is split
+    together with its continuation.
+    """
+    buffer = ""
+    for page_text in pages:
+        buffer = f"{buffer}\n{page_text}" if buffer else page_text
+        if len(buffer) < window:
+            continue
+        pieces = splitter.split_text(buffer)
+        yield from pieces[:-1]
+        buffer = pieces[-1] if pieces else ""
+    if buffer:
+        yield from splitter.split_text(buffer)
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def build_vectorstore(pdf_path: str, embeddings) -> "FAISS":
+    """Stream a PDF from disk into a FAISS index, EMBED_BATCH_SIZE chunks at a time"""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.vectorstores import FAISS
 
-    # 1) Extract text
-    full_text = pdf_to_text(pdf_bytes)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunks = iter_text_chunks(iter_pdf_pages(pdf_path), splitter)
 
-    # 2) Chunk text
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    chunks = splitter.split_text(full_text)
-    logger.info("Split into %d chunks", len(chunks))
+    store = None
+    total = 0
+    for batch in batched(chunks, EMBED_BATCH_SIZE):
+        if store is None:
+            store = FAISS.from_texts(batch, embeddings)
+        else:
+            store.add_texts(batch)
+        total += len(batch)
+    if store is None:
+        raise ValueError("No extractable text found in PDF")
+    logger.info("FAISS index built from %d chunks", total)
+    return store
 
-    # 3) Build embeddings index
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vectorstore = FAISS.from_texts(chunks, embeddings)
-    logger.info("FAISS index built")
+async def spool_upload(file: UploadFile) -> tuple[str, str]:
+    """
+    Copy an upload to a temporary file in fixed-size chunks. Returns the
+    file's path and a report id derived from a hash of its contents.
+    """
+    spool = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    digest = hashlib.sha256()
+    try:
+        with spool:
+            while chunk := await file.read(UPLOAD_SPOOL_CHUNK):
+                spool.write(chunk)
+                digest.update(chunk)
+    except Exception:
+        os.unlink(spool.name)
+        raise
+    return spool.name, digest.hexdigest()[:16]
+
+def register_report(report_id: str, entry: dict) -> List[dict]:
+    """
+    Add or refresh a report as the most recent upload, evicting the oldest
+    past MAX_INDEXED_REPORTS. An evicted report keeps its parsed /compare
+    figures (they are tiny and keyed by content hash), so re-uploading it
+    only costs the re-embedding. Returns the evicted reports.
+    """
+    evicted = []
+    with _registry_lock:
+        reports[report_id] = entry
+        reports.move_to_end(report_id)
+        while len(reports) > MAX_INDEXED_REPORTS:
+            old_id, old = reports.popitem(last=False)
+            _drop_cached_answers(old_id, keep_figures=True)
+            evicted.append({"report_id": old_id, "label": old["label"]})
+            logger.warning("Evicted report %s (%s) from the index registry", old_id, old["label"])
+    return evicted
+
+def forget_report(report_id: str) -> bool:
+    """Remove a report and its cached answers; returns False if it was not indexed"""
+    global vectorstore, qa_chain, quiz_data
+    with _registry_lock:
+        entry = reports.pop(report_id, None)
+        if entry is None:
+            return False
+        _drop_cached_answers(report_id)
+        if entry["qa_chain"] is qa_chain:
+            vectorstore, qa_chain, quiz_data = None, None, None
+    return True
+
+def _drop_cached_answers(report_id: str, keep_figures: bool = False):
+    for key in [key for key in extraction_cache if key[0] == report_id]:
+        if keep_figures and key[1] == FIGURES_PROMPT:
+            continue
+        del extraction_cache[key]
+
+def cache_get(key: tuple) -> Any:
+    with _registry_lock:
+        if key not in extraction_cache:
+            return None
+        extraction_cache.move_to_end(key)
+        return extraction_cache[key]
+
+def cache_put(key: tuple, value: Any):
+    with _registry_lock:
+        if key[0] not in reports:  # report was deleted or evicted meanwhile
+            return
+        extraction_cache[key] = value
+        extraction_cache.move_to_end(key)
+        while len(extraction_cache) > EXTRACTION_CACHE_SIZE:
+            extraction_cache.popitem(last=False)
+
+def build_index_and_chain(pdf_path: str, report_id: str, label: str, company: Optional[str] = None):
+    global vectorstore, qa_chain
+    from langchain.chains import RetrievalQA
+    from langchain.prompts import PromptTemplate
+
+    # 1-3) Stream pages -> chunks -> batched embeddings into FAISS
+    store = build_vectorstore(pdf_path, get_embeddings())
 
     # 4) Setup RetrievalQA with custom prompt
-    llm = ChatOpenAI(
-        model="deepseek/deepseek-chat-v3-0324:free",
-        base_url="https://openrouter.ai/api/v1",
-        api_key=OPENROUTER_API_KEY,
-        temperature=0
-    )
+    llm = get_llm()
 
     # Create a custom prompt template
     prompt_template = """You are a financial analyst assistant. Use the following pieces of context to answer the question. 
@@ -113,14 +334,117 @@ def build_index_and_chain(pdf_bytes: bytes):
         input_variables=["context", "question"]
     )
 
-    qa_chain = RetrievalQA.from_chain_type(
+    chain = RetrievalQA.from_chain_type(
         llm=llm,
         chain_type="stuff",
-        retriever=vectorstore.as_retriever(search_kwargs={"k": 4}),
+        retriever=store.as_retriever(search_kwargs={"k": RETRIEVAL_K}),
         return_source_documents=True,
         chain_type_kwargs={"prompt": PROMPT}
     )
-    logger.info("RetrievalQA chain initialized")
+    evicted = register_report(report_id, {
+        "label": label, "company": company, "vectorstore": store, "qa_chain": chain,
+    })
+    with _registry_lock:
+        vectorstore, qa_chain = store, chain
+    logger.info("RetrievalQA chain initialized for report %s (%s)", report_id, label)
+    return evicted
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Structured (JSON) LLM output
+# ─────────────────────────────────────────────────────────────────────────────
+# Every JSON endpoint goes through parse_structured(): find the first JSON
+# value in the answer, repair common defects (backend/json_repair.py),
+# validate against the endpoint's Pydantic model. Only if that fails does query_structured() re-ask the LLM,
+# with the bad output and the error but without retrieval context.
+
+class StructuredOutputError(ValueError):
+    pass
+
+json_stats = {
+    "responses": 0,  # answers parsed
+    "clean": 0,      # valid as returned (fences / surrounding prose aside)
+    "repaired": 0,   # valid after repair_json()
+    "reasked": 0,    # needed a re-ask, which then parsed
+    "failed": 0,     # unusable even after a re-ask (or with re-ask disabled)
+}
+_json_stats_lock = threading.Lock()
+
+def _count(outcome: str):
+    with _json_stats_lock:
+        json_stats[outcome] += 1
+
+def _extract_structured(raw: str, schema: Any) -> Tuple[str, Any]:
+    """Return ("clean" | "repaired", value) for the first candidate that validates"""
+    adapter = TypeAdapter(schema)
+    last_error = "no JSON value found"
+    for candidate in find_json_candidates(raw):
+        for outcome, text in (("clean", candidate), ("repaired", repair_json(candidate))):
+            try:
+                value = adapter.validate_python(json.loads(text))
+            except ValueError as e:  # JSONDecodeError and ValidationError are both ValueErrors
+                last_error = str(e)
+                continue
+            return outcome, value
+    raise StructuredOutputError(last_error)
+
+def parse_structured(raw: str, schema: Any) -> Any:
+    """
+    Extract and validate the first JSON value in `raw` that matches `schema`
+    (a Pydantic model or a typing alias such as List[Model]).
+    Raises StructuredOutputError if nothing usable is found.
+    """
+    _count("responses")
+    try:
+        outcome, value = _extract_structured(raw, schema)
+    except StructuredOutputError:
+        _count("failed")
+        raise
+    _count(outcome)
+    return value
+
+REASK_PROMPT = """The text below was supposed to be JSON matching this JSON Schema, but it could not be used.
+
+Schema: {schema}
+
+Error: {error}
+
+Text:
+{raw}
+
+Return ONLY the corrected JSON value, with no additional text."""
+
+def query_structured(chain: "RetrievalQA", prompt: str, schema: Any, reask: bool = True) -> Any:
+    """
+    Ask `chain` a question whose answer should be JSON and return it validated
+    against `schema`. Falls back to one context-free re-ask of the LLM to fix
+    its own output, unless `reask` is False (for endpoints with their own fallback).
+    """
+    result = chain.invoke({"query": prompt})
+    raw_response = result["result"].strip()
+    _count("responses")
+    try:
+        outcome, value = _extract_structured(raw_response, schema)
+        _count(outcome)
+        return value
+    except StructuredOutputError as e:
+        logger.warning("Unparseable JSON from LLM: %s\nRaw response: %s", e, raw_response)
+        if not reask:
+            _count("failed")
+            raise
+        error = e
+
+    fix_prompt = REASK_PROMPT.format(
+        schema=json.dumps(TypeAdapter(schema).json_schema()), error=error, raw=raw_response
+    )
+    fixed_response = get_llm().invoke(fix_prompt).content
+    try:
+        _, value = _extract_structured(fixed_response, schema)
+    except StructuredOutputError:
+        _count("failed")
+        logger.error("Re-ask did not produce usable JSON: %s", fixed_response)
+        raise
+    _count("reasked")
+    return value
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Request / Response models
@@ -132,7 +456,18 @@ class AskResponse(BaseModel):
     answer: str
     sources: List[str]
 
+class BatchAskRequest(BaseModel):
+    questions: List[str]
+
+class BatchAskItem(BaseModel):
+    question: str
+    answer: Optional[str] = None
+    sources: List[str] = []
+    error: Optional[str] = None
+
 class Metric(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)  # "value": 151.6 is fine
+
     label: str
     value: str
 
@@ -141,27 +476,74 @@ class Metric(BaseModel):
 # ─────────────────────────────────────────────────────────────────────────────
 @app.get("/status")
 def status():
-    """Check if a PDF is indexed and the QA chain is ready"""
+    """Check if a PDF is indexed and the QA chain is ready, plus warm-up progress"""
     is_ready = vectorstore is not None and qa_chain is not None
-    logger.info("Status check: indexed=%s", is_ready)
-    return {"indexed": is_ready}
+    logger.info("Status check: indexed=%s warm=%s", is_ready, warmup_state["ready"])
+    return {
+        "indexed": is_ready,
+        "ready": warmup_state["ready"],
+        "warmup_error": warmup_state["error"],
+        "load_seconds": warmup_state["load_seconds"],
+        "json_parsing": dict(json_stats),
+    }
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 1) Upload & index PDF
 # ─────────────────────────────────────────────────────────────────────────────
 @app.post("/upload")
-async def upload_report(file: UploadFile = File(...)):
+async def upload_report(file: UploadFile = File(...), label: Optional[str] = Form(None),
+                        company: Optional[str] = Form(None)):
+    """
+    Index a report and make it the current one. `label` names it in /compare
+    results (e.g. "FY24" or "Acme FY24"); it defaults to the file name.
+    `company`, if given, groups it in /compare series instead of the
+    company name the LLM extracts.
+    """
+    global vectorstore, qa_chain
     logger.info("Upload request: %s (%s)", file.filename, file.content_type)
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files allowed")
-    pdf_bytes = await file.read()
+    pdf_path, report_id = await spool_upload(file)
+    label = label or os.path.splitext(file.filename or report_id)[0]
     try:
-        build_index_and_chain(pdf_bytes)
+        existing = reports.get(report_id)
+        if existing is not None:
+            # Same PDF as before: reuse its index and any cached extractions
+            logger.info("Report %s already indexed, reusing it", report_id)
+            company = company or existing.get("company")
+            entry = {**existing, "label": label, "company": company}
+            evicted = register_report(report_id, entry)
+            with _registry_lock:
+                vectorstore, qa_chain = entry["vectorstore"], entry["qa_chain"]
+        else:
+            # Off the event loop: this may wait on warm-up and then embeds the whole PDF
+            evicted = await asyncio.to_thread(build_index_and_chain, pdf_path, report_id, label, company)
     except Exception as e:
         tb = traceback.format_exc()
         logger.error("Indexing failed: %s\n%s", e, tb)
         raise HTTPException(status_code=500, detail=f"Indexing failed: {e}")
-    return {"detail": "Report indexed successfully"}
+    finally:
+        os.unlink(pdf_path)
+    return {
+        "detail": "Report indexed successfully",
+        "report_id": report_id,
+        "label": label,
+        "company": company,
+        "evicted": evicted,  # older reports dropped to stay within MAX_INDEXED_REPORTS
+    }
+
+@app.get("/reports")
+def list_reports():
+    """List every indexed report that /compare can use"""
+    return [{"report_id": rid, "label": r["label"]} for rid, r in list(reports.items())]
+
+@app.delete("/reports/{report_id}")
+def delete_report(report_id: str):
+    """Drop a report's index and cached answers; deleting the current report clears it"""
+    if not forget_report(report_id):
+        raise HTTPException(status_code=404, detail=f"Unknown report id: {report_id}")
+    logger.info("Deleted report %s", report_id)
+    return {"detail": "Report deleted", "report_id": report_id}
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 2) General QA
@@ -180,6 +562,80 @@ def ask(request: AskRequest):
     sources = [doc.page_content for doc in result["source_documents"]]
     return AskResponse(answer=answer, sources=sources)
 
+# ─────────────────────────────────────────────────────────────────────────────
+# 2b) Batch QA
+# ─────────────────────────────────────────────────────────────────────────────
+def retrieve_batch(store: "FAISS", questions: List[str], k: int = RETRIEVAL_K) -> List[List[Any]]:
+    """
+    Embed every question in one encode call and run a single multi-query
+    FAISS search. Returns the top-k documents for each question, in order.
+    """
+    import numpy as np
+
+    vectors = np.asarray(get_embeddings().embed_documents(questions), dtype=np.float32)
+    _, indices = store.index.search(vectors, k)
+    results = []
+    for row in indices:
+        docs = []
+        for i in row:
+            if i == -1:  # fewer than k chunks in the index
+                continue
+            docs.append(store.docstore.search(store.index_to_docstore_id[i]))
+        results.append(docs)
+    return results
+
+async def answer_with_docs(chain: "RetrievalQA", question: str, docs: List[Any],
+                           limit: asyncio.Semaphore) -> BatchAskItem:
+    """Run the QA chain's LLM step on pre-retrieved documents; failures stay on the item"""
+    sources = [doc.page_content for doc in docs]
+    async with limit:
+        try:
+            result = await chain.combine_documents_chain.ainvoke(
+                {"input_documents": docs, "question": question}
+            )
+        except Exception as e:
+            logger.error("Batch QA error for %r: %s", question, e, exc_info=True)
+            return BatchAskItem(question=question, sources=sources, error=str(e))
+    return BatchAskItem(question=question, answer=result["output_text"], sources=sources)
+
+@app.post("/ask/batch", response_model=List[BatchAskItem])
+async def ask_batch(request: BatchAskRequest):
+    """
+    Answer a list of questions against the indexed report. Retrieval is done
+    in one batch; LLM calls run concurrently (ASK_BATCH_CONCURRENCY at a time).
+    Results come back in question order, each with its own answer or error.
+    """
+    # One consistent report for the whole batch, even if an upload or DELETE lands meanwhile
+    with _registry_lock:
+        store, chain = vectorstore, qa_chain
+    if chain is None:
+        raise HTTPException(status_code=400, detail="No report indexed yet.")
+    if not request.questions:
+        return []
+    if len(request.questions) > ASK_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {ASK_BATCH_MAX_QUESTIONS} questions per batch.",
+        )
+
+    try:
+        retrieved = await asyncio.to_thread(retrieve_batch, store, request.questions)
+    except Exception as e:
+        tb = traceback.format_exc()
+        logger.error("Batch retrieval error: %s\n%s", e, tb)
+        raise HTTPException(status_code=500, detail=f"Batch retrieval failed: {e}")
+
+    limit = asyncio.Semaphore(ASK_BATCH_CONCURRENCY)
+    items = await asyncio.gather(*(
+        answer_with_docs(chain, question, docs, limit)
+        for question, docs in zip(request.questions, retrieved)
+    ))
+    logger.info(
+        "Answered batch of %d questions (%d failed)",
+        len(items), sum(item.error is not None for item in items),
+    )
+    return items
+
 # ─────────────────────────────────────────────────────────────────────────────
 # 3) Extract financial metrics
 # ─────────────────────────────────────────────────────────────────────────────
@@ -197,13 +653,9 @@ def extract_metrics():
         '[{"label":"Revenue","value":"INR 355,170 Million"}, ...].'
     )
     try:
-        result = qa_chain({"query": PROMPT})
-        # Expect result["result"] to be JSON text
-        metrics_json = result["result"].strip()
-        metrics: Any = json.loads(metrics_json)
-        return JSONResponse(content=metrics)
-    except json.JSONDecodeError as je:
-        logger.error("Failed to parse JSON from LLM: %s", je)
+        return query_structured(qa_chain, PROMPT, List[Metric])
+    except StructuredOutputError as se:
+        logger.error("Failed to parse JSON from LLM: %s", se)
         raise HTTPException(status_code=500, detail="Failed to parse metrics JSON.")
     except Exception as e:
         tb = traceback.format_exc()
@@ -237,6 +689,43 @@ class FinancialMetrics(BaseModel):
     net_profit: str
     basic_eps: str
 
+class PartialExtraction(BaseModel):
+    """
+    What the LLM returns for endpoints that merge its answer over defaults:
+    every field is optional, numbers are accepted as strings, and at least
+    one field must be present so an empty or unrelated object is not a parse.
+    """
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    @model_validator(mode="after")
+    def _has_some_field(self):
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("none of the expected fields are present")
+        return self
+
+class KeyMetricsExtraction(PartialExtraction):
+    revenue: Optional[str] = None
+    revenue_growth: Optional[str] = None
+    profit: Optional[str] = None
+    profit_growth: Optional[str] = None
+    roe: Optional[str] = None
+    eps: Optional[str] = None
+
+class FinancialMetricsExtraction(PartialExtraction):
+    total_assets: Optional[str] = None
+    total_equity: Optional[str] = None
+    current_assets: Optional[str] = None
+    revenue_operations: Optional[str] = None
+    net_profit: Optional[str] = None
+    basic_eps: Optional[str] = None
+
+class RevenueSegment(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    segment: str
+    percentage: float
+    revenue: str
+
 class QuarterlyData(BaseModel):
     quarter: str
     revenue: float
@@ -268,6 +757,9 @@ class QuizResult(BaseModel):
     correct_answer: str
     explanation: str
 
+class QuizExplanation(BaseModel):
+    explanation: str
+
 @app.get("/timeseries", response_model=TimeSeriesData)
 def get_timeseries():
     """
@@ -283,14 +775,9 @@ def get_timeseries():
     )
     
     try:
-        result = qa_chain({"query": PROMPT})
-        data = json.loads(result["result"].strip())
-        # Validate the structure
-        if not isinstance(data, dict) or 'revenue' not in data or 'profit' not in data:
-            raise ValueError("Invalid data structure")
-        return data
-    except json.JSONDecodeError as je:
-        logger.error("Failed to parse JSON from LLM: %s", je)
+        return query_structured(qa_chain, PROMPT, TimeSeriesData)
+    except StructuredOutputError as se:
+        logger.error("Failed to parse JSON from LLM: %s", se)
         raise HTTPException(status_code=500, detail="Failed to parse financial data")
     except Exception as e:
         logger.error("Error: %s", e)
@@ -310,14 +797,9 @@ def get_segments():
     )
     
     try:
-        result = qa_chain({"query": PROMPT})
-        data = json.loads(result["result"].strip())
-        # Validate the structure
-        if not isinstance(data, list):
-            raise ValueError("Invalid data structure")
-        return data
-    except json.JSONDecodeError as je:
-        logger.error("Failed to parse JSON from LLM: %s", je)
+        return query_structured(qa_chain, PROMPT, List[SegmentData])
+    except StructuredOutputError as se:
+        logger.error("Failed to parse JSON from LLM: %s", se)
         raise HTTPException(status_code=500, detail="Failed to parse segment data")
     except Exception as e:
         logger.error("Error: %s", e)
@@ -351,49 +833,26 @@ def get_key_metrics():
     }
     '''
     
+    # Default values from the PDF
+    default_metrics = {
+        "revenue": "INR 355,170 Million",
+        "revenue_growth": "7.0%",
+        "profit": "INR 45,846 Million",
+        "profit_growth": "4.0%",
+        "roe": "25.0%",
+        "eps": "INR 151.60"
+    }
+
     try:
-        result = qa_chain({"query": PROMPT})
-        raw_response = result["result"].strip()
-        logger.info("Raw LLM response for metrics: %s", raw_response)
-        
-        # Default values from the PDF
-        default_metrics = {
-            "revenue": "INR 355,170 Million",
-            "revenue_growth": "7.0%",
-            "profit": "INR 45,846 Million",
-            "profit_growth": "4.0%",
-            "roe": "25.0%",
-            "eps": "INR 151.60"
-        }
-        
-        try:
-            # Try to extract JSON if wrapped in code blocks
-            if "```json" in raw_response:
-                raw_response = raw_response.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_response:
-                raw_response = raw_response.split("```")[1].strip()
-            
-            data = json.loads(raw_response)
-            
-            # Ensure all fields are strings and have default values
-            metrics_data = {
-                "revenue": str(data.get("revenue", default_metrics["revenue"])),
-                "revenue_growth": str(data.get("revenue_growth", default_metrics["revenue_growth"])),
-                "profit": str(data.get("profit", default_metrics["profit"])),
-                "profit_growth": str(data.get("profit_growth", default_metrics["profit_growth"])),
-                "roe": str(data.get("roe", default_metrics["roe"])),
-                "eps": str(data.get("eps", default_metrics["eps"]))
-            }
-            
-            metrics = KeyMetrics(**metrics_data)
-            logger.info("Successfully extracted key metrics: %s", metrics)
-            return metrics
-            
-        except json.JSONDecodeError as je:
-            logger.error("Failed to parse metrics JSON: %s\nRaw response: %s", je, raw_response)
-            logger.info("Falling back to default metrics")
-            return KeyMetrics(**default_metrics)
-            
+        # Missing fields fall back to the defaults; no re-ask since there is a fallback
+        data = query_structured(qa_chain, PROMPT, KeyMetricsExtraction, reask=False)
+        metrics = KeyMetrics(**{**default_metrics, **data.model_dump(exclude_none=True)})
+        logger.info("Successfully extracted key metrics: %s", metrics)
+        return metrics
+    except StructuredOutputError as se:
+        logger.error("Failed to parse metrics JSON: %s", se)
+        logger.info("Falling back to default metrics")
+        return KeyMetrics(**default_metrics)
     except Exception as e:
         logger.error("Error extracting key metrics: %s", str(e), exc_info=True)
         # Instead of raising an error, return default values
@@ -430,47 +889,31 @@ def get_financial_metrics():
     }
     '''
     
+    # Default values from the PDF
+    default_metrics = {
+        "total_assets": "INR 264,577 Million",
+        "total_equity": "INR 192,885 Million",
+        "current_assets": "INR 118,816 Million",
+        "revenue_operations": "INR 362,534 Million",
+        "net_profit": "INR 44,859 Million",
+        "basic_eps": "INR 151.60"
+    }
+
     try:
-        result = qa_chain({"query": PROMPT})
-        raw_response = result["result"].strip()
-        logger.info("Raw LLM response for financial metrics: %s", raw_response)
-        
-        # Default values from the PDF
-        default_metrics = {
-            "total_assets": "INR 264,577 Million",
-            "total_equity": "INR 192,885 Million",
-            "current_assets": "INR 118,816 Million",
-            "revenue_operations": "INR 362,534 Million",
-            "net_profit": "INR 44,859 Million",
-            "basic_eps": "INR 151.60"
-        }
-        
-        try:
-            if "```json" in raw_response:
-                raw_response = raw_response.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_response:
-                raw_response = raw_response.split("```")[1].strip()
-            
-            data = json.loads(raw_response)
-            metrics = FinancialMetrics(
-                total_assets=data.get("total_assets", default_metrics["total_assets"]),
-                total_equity=data.get("total_equity", default_metrics["total_equity"]),
-                current_assets=data.get("current_assets", default_metrics["current_assets"]),
-                revenue_operations=data.get("revenue_operations", default_metrics["revenue_operations"]),
-                net_profit=data.get("net_profit", default_metrics["net_profit"]),
-                basic_eps=data.get("basic_eps", default_metrics["basic_eps"])
-            )
-            logger.info("Successfully extracted financial metrics: %s", metrics)
-            return metrics
-        except json.JSONDecodeError as je:
-            logger.error("Failed to parse financial metrics JSON: %s\nRaw response: %s", je, raw_response)
-            logger.info("Falling back to default metrics")
-            return FinancialMetrics(**default_metrics)
+        # Missing fields fall back to the defaults; no re-ask since there is a fallback
+        data = query_structured(qa_chain, PROMPT, FinancialMetricsExtraction, reask=False)
+        metrics = FinancialMetrics(**{**default_metrics, **data.model_dump(exclude_none=True)})
+        logger.info("Successfully extracted financial metrics: %s", metrics)
+        return metrics
+    except StructuredOutputError as se:
+        logger.error("Failed to parse financial metrics JSON: %s", se)
+        logger.info("Falling back to default metrics")
+        return FinancialMetrics(**default_metrics)
     except Exception as e:
         logger.error("Error extracting financial metrics: %s", str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/revenue-breakdown", response_model=List[dict])
+@app.get("/revenue-breakdown", response_model=List[RevenueSegment])
 def get_revenue_breakdown():
     """Extract revenue breakdown by segment from the PDF"""
     if qa_chain is None:
@@ -494,41 +937,26 @@ def get_revenue_breakdown():
     ]
     '''
     
+    # Default values
+    default_breakdown = [
+        {"segment": "Cloud Services", "percentage": 74.8, "revenue": "USD 678.8B"},
+        {"segment": "Cybersecurity", "percentage": 23.0, "revenue": "USD 208.8B"},
+        {"segment": "Sustainability", "percentage": 2.2, "revenue": "USD 19.83B"}
+    ]
+
     try:
-        result = qa_chain({"query": PROMPT})
-        raw_response = result["result"].strip()
-        logger.info("Raw LLM response for revenue breakdown: %s", raw_response)
-        
-        # Default values
-        default_breakdown = [
-            {"segment": "Cloud Services", "percentage": 74.8, "revenue": "USD 678.8B"},
-            {"segment": "Cybersecurity", "percentage": 23.0, "revenue": "USD 208.8B"},
-            {"segment": "Sustainability", "percentage": 2.2, "revenue": "USD 19.83B"}
-        ]
-        
-        # If response indicates no data or is invalid
-        if "don't know" in raw_response.lower() or "no information" in raw_response.lower():
-            logger.warning("No revenue breakdown data found, using defaults")
-            return default_breakdown
-            
-        try:
-            # Try to extract JSON if wrapped in code blocks
-            if "```json" in raw_response:
-                raw_response = raw_response.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_response:
-                raw_response = raw_response.split("```")[1].strip()
-            
-            data = json.loads(raw_response)
-            if not isinstance(data, list) or len(data) == 0:
-                logger.warning("Invalid revenue breakdown structure, using defaults")
-                return default_breakdown
-            
-            logger.info("Successfully extracted revenue breakdown: %s", data)
-            return data
-        except json.JSONDecodeError as je:
-            logger.error("Failed to parse revenue breakdown JSON: %s\nRaw response: %s", je, raw_response)
-            logger.info("Falling back to default breakdown")
+        # No re-ask: a "don't know" answer has no JSON in it and goes straight to the defaults
+        data = query_structured(qa_chain, PROMPT, List[RevenueSegment], reask=False)
+        if len(data) == 0:
+            logger.warning("Empty revenue breakdown, using defaults")
             return default_breakdown
+
+        logger.info("Successfully extracted revenue breakdown: %s", data)
+        return data
+    except StructuredOutputError as se:
+        logger.error("Failed to parse revenue breakdown JSON: %s", se)
+        logger.info("Falling back to default breakdown")
+        return default_breakdown
     except Exception as e:
         logger.error("Error extracting revenue breakdown: %s", str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -547,8 +975,7 @@ def get_quarterly_performance():
     '''
     
     try:
-        result = qa_chain({"query": PROMPT})
-        return json.loads(result["result"].strip())
+        return query_structured(qa_chain, PROMPT, List[QuarterlyData])
     except Exception as e:
         logger.error("Error extracting quarterly data: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -574,8 +1001,7 @@ def get_recommendations():
     '''
     
     try:
-        result = qa_chain({"query": PROMPT})
-        return json.loads(result["result"].strip())
+        return query_structured(qa_chain, PROMPT, RecommendationData)
     except Exception as e:
         logger.error("Error generating recommendations: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -628,49 +1054,14 @@ def generate_quiz():
     REMEMBER: Return ONLY the JSON object, no additional text or formatting."""
 
     try:
-        # Use invoke instead of __call__
-        result = qa_chain.invoke({"query": PROMPT})
-        raw_response = result["result"].strip()
-        
-        # Log the raw response for debugging
-        logger.info(f"Raw quiz generation response: {raw_response}")
-        
-        # Clean up the response
-        if "```json" in raw_response:
-            raw_response = raw_response.split("```json")[1].split("```")[0].strip()
-        elif "```" in raw_response:
-            raw_response = raw_response.split("```")[1].strip()
-        
-        try:
-            quiz_data = json.loads(raw_response)
-        except json.JSONDecodeError as je:
-            logger.error(f"JSON decode error: {je}\nRaw response: {raw_response}")
-            raise ValueError(f"Failed to parse JSON response: {je}")
-
-        # Validate structure
-        if not isinstance(quiz_data, dict):
-            raise ValueError("Response is not a JSON object")
-            
-        if "questions" not in quiz_data:
-            raise ValueError("Response missing 'questions' array")
-            
-        questions = quiz_data["questions"]
-        if not isinstance(questions, list):
-            raise ValueError("'questions' is not an array")
-            
+        quiz = query_structured(qa_chain, PROMPT, QuizResponse).model_dump()
+
+        questions = quiz["questions"]
         if len(questions) != 10:
             raise ValueError(f"Expected 10 questions, got {len(questions)}")
             
         # Validate each question
         for i, q in enumerate(questions):
-            required_fields = ["id", "question", "choices", "correct_answer"]
-            missing_fields = [f for f in required_fields if f not in q]
-            if missing_fields:
-                raise ValueError(f"Question {i+1} missing fields: {', '.join(missing_fields)}")
-                
-            if not isinstance(q["choices"], dict):
-                raise ValueError(f"Question {i+1}: 'choices' must be an object")
-                
             if len(q["choices"]) != 4:
                 raise ValueError(f"Question {i+1} must have exactly 4 choices")
                 
@@ -681,6 +1072,7 @@ def generate_quiz():
             if q["correct_answer"] not in ["A", "B", "C", "D"]:
                 raise ValueError(f"Question {i+1} has invalid correct_answer: {q['correct_answer']}")
         
+        quiz_data = quiz
         logger.info("Successfully generated and validated quiz with 10 questions")
         return quiz_data
         
@@ -729,26 +1121,17 @@ Return ONLY a JSON object in this exact format:
 }}"""
     
     try:
-        # Use invoke instead of __call__
-        result = qa_chain.invoke({"query": PROMPT})
-        raw_response = result["result"].strip()
-        
-        if "```json" in raw_response:
-            raw_response = raw_response.split("```json")[1].split("```")[0].strip()
-        elif "```" in raw_response:
-            raw_response = raw_response.split("```")[1].strip()
-
         try:
-            answer_data = json.loads(raw_response)
-            
-            # Override with known correct values
-            answer_data["question_id"] = submission.question_id
-            answer_data["is_correct"] = is_correct
-            answer_data["correct_answer"] = question["correct_answer"]
-            
-            return QuizResult(**answer_data)
+            # Only the explanation is taken from the LLM; the rest is known
+            answer_data = query_structured(qa_chain, PROMPT, QuizExplanation, reask=False)
+            return QuizResult(
+                question_id=submission.question_id,
+                is_correct=is_correct,
+                correct_answer=question["correct_answer"],
+                explanation=answer_data.explanation
+            )
             
-        except json.JSONDecodeError:
+        except StructuredOutputError:
             # If we can't get a proper explanation, return a basic one
             return QuizResult(
                 question_id=submission.question_id,
@@ -764,6 +1147,217 @@ Return ONLY a JSON object in this exact format:
             detail=f"Failed to check answer: {str(e)}"
         )
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Cross-report comparison
+# ─────────────────────────────────────────────────────────────────────────────
+class CompareRequest(BaseModel):
+    report_ids: Optional[List[str]] = None  # default: every indexed report
+    question: Optional[str] = None          # default: headline revenue / profit
+
+class ReportFigures(BaseModel):
+    company: Optional[str] = None
+    period: Optional[str] = None
+    currency: Optional[str] = None
+    unit: Optional[str] = None
+    revenue: Optional[float] = None
+    profit: Optional[float] = None
+
+class CompareRow(ReportFigures):
+    report_id: str
+    label: str
+    year: Optional[int] = None   # calendar year the financial year ends in
+    answer: Optional[str] = None
+    note: Optional[str] = None   # why the row was left out of the series
+    error: Optional[str] = None
+
+class CompareSeries(BaseModel):
+    name: str                    # company, or the report label if it is unknown
+    currency: str
+    unit: str = "million"        # revenue / profit are normalised to millions of `currency`
+    revenue: List[dict]          # [{"x": 2024, "y": 355170.0, "report": "FY24"}, ...] by year
+    profit: List[dict]
+
+class CompareResponse(BaseModel):
+    years: List[int]             # shared x axis for every series
+    series: List[CompareSeries]
+    table: List[CompareRow]
+
+FIGURES_PROMPT = '''
+From this annual report's own headline figures for the financial year it covers, extract:
+
+1. The company's name
+2. The financial year the report covers (e.g. "FY24")
+3. The currency of the figures as an ISO 4217 code (e.g. "INR", "USD")
+4. The unit the figures are stated in: "units", "thousand", "lakh", "million", "crore" or "billion"
+5. Revenue from operations as a plain number in that unit
+6. Profit after tax as a plain number in that unit
+
+Format your response EXACTLY as a JSON object like this, with no additional text:
+{"company": "Acme Ltd", "period": "FY24", "currency": "INR", "unit": "million", "revenue": 355170, "profit": 45846}
+'''
+
+UNIT_MULTIPLIERS = {
+    "unit": 1, "thousand": 1e3, "k": 1e3, "lakh": 1e5, "lac": 1e5,
+    "million": 1e6, "mn": 1e6, "crore": 1e7, "cr": 1e7, "billion": 1e9, "bn": 1e9,
+}
+
+_YEAR_SPAN = re.compile(r"(?<!\d)(\d{4}|\d{2})\s*[-/–]\s*(\d{4}|\d{2})(?!\d)")
+_SINGLE_YEAR = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)|FY\s*'?(\d{1,2})(?!\d)", flags=re.IGNORECASE)
+
+def fiscal_year(period: Optional[str]) -> Optional[int]:
+    """
+    Map a financial-year label to the calendar year it ends in, so reports
+    sort and align numerically: "FY24", "FY 2024", "2023-24", "FY23-24",
+    "FY2023/24" and "2024" all give 2024. A span only counts when its end is
+    the year after its start (so dates like "2023-03-31" are not spans), and
+    when several years are named the last one wins ("April 2023 - March 2024").
+    """
+    if not period:
+        return None
+    spans = []
+    for match in _YEAR_SPAN.finditer(period):
+        start, end = match.group(1), match.group(2)
+        if len(start) == 2:
+            # Two-digit starts are only years when labelled, as in "FY24-25"
+            if not re.search(r"FY\s*'?$", period[:match.start()], flags=re.IGNORECASE):
+                continue
+            start = "20" + start
+        successor = int(start) + 1
+        if int(end) == (successor if len(end) == 4 else successor % 100):
+            spans.append(successor)
+    if spans:
+        return spans[-1]
+
+    years = [int(full) if full else 2000 + int(short) for full, short in _SINGLE_YEAR.findall(period)]
+    return years[-1] if years else None
+
+def to_millions(value: Optional[float], unit: Optional[str]) -> Optional[float]:
+    """Convert a figure stated in `unit` to millions, or None if the unit is unknown"""
+    multiplier = UNIT_MULTIPLIERS.get((unit or "").strip().lower().rstrip("s"))
+    if value is None or multiplier is None:
+        return None
+    return value * multiplier / 1e6
+
+_COMPANY_SUFFIXES = {
+    "ltd", "limited", "inc", "incorporated", "corp", "corporation", "co", "company",
+    "plc", "llc", "pvt", "private", "sa", "ag", "nv",
+}
+
+def company_key(name: str) -> str:
+    """
+    Normalise a company name so the LLM's spellings of one company group
+    together: "Infosys Limited", "Infosys Ltd." and "INFOSYS" all give "infosys".
+    """
+    words = re.sub(r"[^\w\s]", " ", name.casefold().replace("&", " and ")).split()
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in _COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+def build_series(rows: List[CompareRow]) -> Tuple[List[int], List[CompareSeries]]:
+    """
+    Merge per-report figures into one series per company (see company_key)
+    and currency, keyed on fiscal year. Figures are normalised to millions; rows whose year, unit
+    or currency is unknown are left out with a note rather than guessed at.
+    Series in different currencies are never merged.
+    """
+    grouped: dict = {}
+    names: dict = {}  # group key -> company name as first written
+    for row in rows:
+        if row.error is not None or row.answer is not None:
+            continue
+        if row.year is None:
+            row.note = f"Unrecognised period {row.period!r}; not merged"
+            continue
+        if not row.currency or to_millions(1, row.unit) is None:
+            row.note = f"Unknown currency/unit ({row.currency!r}, {row.unit!r}); not merged"
+            continue
+        name = row.company or row.label
+        key = (company_key(name), row.currency.strip().upper())
+        names.setdefault(key, name)
+        by_year = grouped.setdefault(key, {})
+        if row.year in by_year:
+            row.note = f"Duplicate of report {by_year[row.year].report_id} for {row.year}; not merged"
+            continue
+        by_year[row.year] = row
+
+    series = []
+    for (key, currency), by_year in grouped.items():
+        points = [by_year[year] for year in sorted(by_year)]
+        series.append(CompareSeries(
+            name=names[(key, currency)],
+            currency=currency,
+            revenue=[{"x": r.year, "y": to_millions(r.revenue, r.unit), "report": r.label}
+                     for r in points if r.revenue is not None],
+            profit=[{"x": r.year, "y": to_millions(r.profit, r.unit), "report": r.label}
+                    for r in points if r.profit is not None],
+        ))
+    years = sorted({year for by_year in grouped.values() for year in by_year})
+    return years, series
+
+async def ask_report(chain: "RetrievalQA", prompt: str, limit: asyncio.Semaphore) -> str:
+    async with limit:
+        result = await chain.ainvoke({"query": prompt})
+    return result["result"].strip()
+
+async def compare_report(report_id: str, entry: dict, question: Optional[str],
+                         limit: asyncio.Semaphore) -> CompareRow:
+    """
+    Ask one report the question (or extract its headline figures), reusing
+    the cached result if this report was already asked. Figures are cached
+    parsed, so cache hits are not counted again in json_stats; answers that
+    fail to parse are not cached and are asked again next time.
+    """
+    row = CompareRow(report_id=report_id, label=entry["label"])
+    key = (report_id, question or FIGURES_PROMPT)
+    try:
+        cached = cache_get(key)
+        if cached is None:
+            raw_response = await ask_report(entry["qa_chain"], question or FIGURES_PROMPT, limit)
+            cached = raw_response if question else parse_structured(raw_response, ReportFigures)
+            cache_put(key, cached)
+        if question:
+            row.answer = cached
+            return row
+
+        return CompareRow(
+            report_id=report_id,
+            label=row.label,
+            year=fiscal_year(cached.period) or fiscal_year(row.label),
+            **{**cached.model_dump(), "company": entry.get("company") or cached.company},
+        )
+    except Exception as e:
+        logger.error("Comparison failed for report %s: %s", report_id, e)
+        row.error = str(e)
+    return row
+
+@app.post("/compare", response_model=CompareResponse)
+async def compare_reports(request: CompareRequest):
+    """
+    Run the same extraction (headline revenue / profit) or question across
+    several indexed reports concurrently, e.g. FY20-FY24 or a set of peers.
+    Figures come back as one series per company on a shared fiscal-year axis.
+    Per-report answers are cached, so adding one report only costs that report.
+    """
+    # Snapshot the entries so an eviction or DELETE mid-comparison can't break this run
+    entries = dict(reports)
+    report_ids = request.report_ids or list(entries)
+    if not report_ids:
+        raise HTTPException(status_code=400, detail="No report indexed yet.")
+    unknown = [rid for rid in report_ids if rid not in entries]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown report ids: {', '.join(unknown)}")
+
+    limit = asyncio.Semaphore(COMPARE_CONCURRENCY)
+    rows = await asyncio.gather(*(
+        compare_report(rid, entries[rid], request.question, limit) for rid in report_ids
+    ))
+
+    years, series = build_series(rows)
+    logger.info("Compared %d reports (%d failed)", len(rows), sum(r.error is not None for r in rows))
+    return CompareResponse(years=years, series=series, table=list(rows))
+
 # ─────────────────────────────────────────────────────────────────────────────
 # To run:
 #    uvicorn backend.app:app --reload --port 8000
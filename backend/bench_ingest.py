@@ -0,0 +1,114 @@
+# backend/bench_ingest.py
+# Peak-memory benchmark for PDF ingestion.
+#
+# Generates synthetic PDFs of several sizes and indexes each one two ways:
+#   - "in-memory": read the whole file, join every page into one string, split, embed all at once
+#   - "streaming": build_vectorstore() from backend/app.py (page iterator -> incremental splitter -> batches)
+# Embeddings are a fixed-size fake so the numbers reflect ingestion, not the model.
+#
+# Every run happens in a fresh subprocess and reports peak RSS (ru_maxrss), so
+# PyMuPDF's document buffers and FAISS's C++ vectors are counted, not just the
+# Python heap. "working" is the peak growth during ingestion minus what the
+# finished index keeps (vectors + chunk text); for the streaming path it should
+# stay flat as the page count grows.
+#
+#    python -m backend.bench_ingest --pages 500 2000 8000
+
+import argparse
+import gc
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+import fitz  # PyMuPDF
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+
+from backend import app as backend_app
+
+PARAGRAPH = (
+    "Revenue from operations grew 7.0% year on year to INR 355,170 Million, "
+    "driven by cloud, cybersecurity and sustainability services. Profit after tax "
+    "rose 4.0% to INR 45,846 Million while return on equity held at 25.0%. "
+)
+
+def make_pdf(path: str, pages: int):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), f"Page {i + 1}\n" + PARAGRAPH * 12, fontsize=8)
+    doc.save(path)
+    doc.close()
+
+def ingest_in_memory(pdf_path: str, embeddings):
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    full_text = "\n".join(page.get_text() for page in doc)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=backend_app.CHUNK_SIZE, chunk_overlap=backend_app.CHUNK_OVERLAP
+    )
+    chunks = splitter.split_text(full_text)
+    return FAISS.from_texts(chunks, embeddings)
+
+def ingest_streaming(pdf_path: str, embeddings):
+    return backend_app.build_vectorstore(pdf_path, embeddings)
+
+PATHS = {"in-memory": ingest_in_memory, "streaming": ingest_streaming}
+
+def peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def retained_mib(store) -> float:
+    """Memory the finished index legitimately keeps: float32 vectors plus chunk text"""
+    vectors = store.index.ntotal * store.index.d * 4
+    texts = sum(len(doc.page_content.encode()) for doc in store.docstore._dict.values())
+    return (vectors + texts) / 2**20
+
+def run_worker(path_name: str, pdf_path: str):
+    """Ingest once in this process and print one result line"""
+    embeddings = FakeEmbeddings(size=384)  # same dimension as all-MiniLM-L6-v2
+    gc.collect()
+    baseline = peak_rss_mib()
+    start = time.perf_counter()
+    store = PATHS[path_name](pdf_path, embeddings)
+    elapsed = time.perf_counter() - start
+    growth = peak_rss_mib() - baseline
+    retained = retained_mib(store)
+    print(
+        f"{path_name:<10} chunks={store.index.ntotal:>7}  peak growth={growth:8.1f} MiB  "
+        f"retained={retained:7.1f} MiB  working={growth - retained:8.1f} MiB  time={elapsed:6.2f}s"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak-RSS benchmark for PDF ingestion")
+    parser.add_argument("--pages", type=int, nargs="+", default=[500, 2000, 8000])
+    parser.add_argument("--worker", choices=PATHS, help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.pdf)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = os.path.join(tmp, f"bench-{pages}.pdf")
+            make_pdf(pdf_path, pages)
+            print(f"{pages} pages, {os.path.getsize(pdf_path) / 2**20:.1f} MiB on disk")
+            for path_name in PATHS:
+                subprocess.run(
+                    [sys.executable, "-m", "backend.bench_ingest", "--worker", path_name, "--pdf", pdf_path],
+                    check=True,
+                )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# backend/bench_startup.py
+# Startup-time benchmark for the API.
+#
+# Each module is imported in a fresh interpreter so the numbers are cold-start
+# costs (shared dependencies are not amortised across rows). "backend.app" is
+# what a uvicorn worker / --reload cycle pays before it can serve /status; the
+# rest are the dependencies the warm-up thread loads in the background.
+#
+#    python -m backend.bench_startup --repeat 3
+
+import argparse
+import os
+import subprocess
+import sys
+
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+from backend.app import HEAVY_MODULES
+
+TIMER = (
+    "import time, importlib; s = time.perf_counter(); "
+    "importlib.import_module({name!r}); print(time.perf_counter() - s)"
+)
+
+def import_seconds(name: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", TIMER.format(name=name)],
+        capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Report cold import time per module")
+    parser.add_argument("--repeat", type=int, default=3, help="take the best of N runs")
+    args = parser.parse_args()
+
+    print(f"{'module':<36} {'best (s)':>9}")
+    for name in ("backend.app", *HEAVY_MODULES):
+        try:
+            best = min(import_seconds(name) for _ in range(args.repeat))
+            print(f"{name:<36} {best:9.3f}")
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<36} {'failed':>9}  {e.stderr.strip().splitlines()[-1]}")
+
+if __name__ == "__main__":
+    main()
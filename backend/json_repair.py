@@ -0,0 +1,91 @@
+# backend/json_repair.py
+# Pure helpers for pulling JSON out of LLM answers and fixing the defects
+# models commonly produce. No third-party imports, so they can be tested
+# without the LangChain / FastAPI stack; validation lives in backend/app.py.
+
+import re
+from typing import Iterator
+
+# A number with thousands separators (355,170 or -1,234,567.5) directly after
+# a key's colon. Array items are left alone: [100,200,300] is three numbers,
+# and merging them would give wrong data that still validates.
+_THOUSANDS_NUMBER = re.compile(r"(:\s*-?)(\d{1,3}(?:,\d{3})+)(?=(?:\.\d+)?\s*[,}\]\n])")
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+def _string_end(text: str, start: int) -> int:
+    """
+    Index of the quote closing the string literal that opens at `start`
+    (len(text) if it is unterminated). Inside a single-quoted string an
+    apostrophe only closes it when followed by , : } ] or the end, so
+    'it's' is read as one string.
+    """
+    quote = text[start]
+    i = start + 1
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == quote:
+            if quote == '"':
+                return i
+            rest = text[i + 1:].lstrip()
+            if not rest or rest[0] in ",:}]":
+                return i
+        i += 1
+    return len(text)
+
+def _repair_bare(segment: str) -> str:
+    """Fix a stretch of JSON that lies outside any string literal"""
+    segment = _TRAILING_COMMA.sub(r"\1", segment)
+    return _THOUSANDS_NUMBER.sub(lambda m: m.group(1) + m.group(2).replace(",", ""), segment)
+
+def repair_json(text: str) -> str:
+    """
+    Fix the defects LLMs commonly produce: single-quoted strings, trailing
+    commas, and numbers written with thousands separators (355,170).
+    String contents are left untouched.
+    """
+    out = []
+    i = bare_start = 0
+    while i < len(text):
+        if text[i] not in "\"'":
+            i += 1
+            continue
+        out.append(_repair_bare(text[bare_start:i]))
+        end = _string_end(text, i)
+        body = text[i + 1:end]
+        if text[i] == "'":
+            body = re.sub(r'(?<!\\)"', r'\\"', body.replace("\\'", "'"))
+        out.append(f'"{body}"')
+        i = bare_start = end + 1
+    out.append(_repair_bare(text[bare_start:]))
+    return "".join(out)
+
+def _balanced_span(text: str, start: int) -> str:
+    """Return the bracket-balanced value starting at `start` (or the rest of the text)"""
+    depth = 0
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if ch in "\"'":
+            i = _string_end(text, i)
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+        i += 1
+    return text[start:]
+
+def find_json_candidates(raw: str, limit: int = 10) -> Iterator[str]:
+    """Yield possible JSON values in an LLM answer, fenced blocks first"""
+    sources = re.findall(r"```(?:json)?\s*(.*?)```", raw, flags=re.DOTALL) + [raw]
+    yielded = 0
+    for source in sources:
+        for match in re.finditer(r"[\[{]", source):
+            yield _balanced_span(source, match.start())
+            yielded += 1
+            if yielded >= limit:
+                return
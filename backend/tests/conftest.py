@@ -0,0 +1,4 @@
+import os
+
+# backend/app.py refuses to import without an API key; tests never call OpenRouter
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
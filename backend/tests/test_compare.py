@@ -0,0 +1,146 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from backend.app import CompareRow, build_series, company_key, fiscal_year, to_millions
+
+
+@pytest.mark.parametrize("period, year", [
+    ("FY24", 2024),
+    ("FY 2024", 2024),
+    ("FY'24", 2024),
+    ("FY9", 2009),
+    ("FY10", 2010),
+    ("2024", 2024),
+    ("2023-24", 2024),
+    ("2023/2024", 2024),
+    ("FY2023-24", 2024),
+    ("FY23-24", 2024),
+    ("FY24-25", 2025),
+    ("2024-25", 2025),
+    ("FY 2024-25", 2025),
+    ("1999-00", 2000),
+    ("2023-03-31", 2023),
+    ("April 2023 - March 2024", 2024),
+    ("Year ended 31 March 2024", 2024),
+    ("Annual Report", None),
+    (None, None),
+])
+def test_fiscal_year(period, year):
+    assert fiscal_year(period) == year
+
+
+@pytest.mark.parametrize("value, unit, millions", [
+    (355170, "million", 355170),
+    (35517, "Crores", 355170),
+    (3551.7, "crore", 35517),
+    (2.5, "billion", 2500),
+    (1500, "thousand", 1.5),
+    (10, "Lakhs", 1),
+    (5_000_000, "units", 5),
+    (1, "USD", None),
+    (1, None, None),
+    (None, "million", None),
+])
+def test_to_millions(value, unit, millions):
+    if millions is None:
+        assert to_millions(value, unit) is None
+    else:
+        assert to_millions(value, unit) == pytest.approx(millions)
+
+
+def row(report_id, label, year, company="Acme", currency="INR", unit="million", revenue=100.0, profit=10.0):
+    return CompareRow(report_id=report_id, label=label, year=year, period=label, company=company,
+                      currency=currency, unit=unit, revenue=revenue, profit=profit)
+
+
+def test_build_series_orders_by_year_and_normalises_units():
+    rows = [
+        row("b", "FY24", 2024, revenue=3.0, unit="billion"),
+        row("a", "FY23", 2023, revenue=2500.0),
+    ]
+    years, series = build_series(rows)
+    assert years == [2023, 2024]
+    assert len(series) == 1
+    assert [p["x"] for p in series[0].revenue] == [2023, 2024]
+    assert [p["y"] for p in series[0].revenue] == [2500.0, 3000.0]
+
+
+def test_build_series_lines_peers_up_on_the_same_years():
+    rows = [
+        row("a", "Acme FY24", 2024, company="Acme"),
+        row("b", "Beta FY24", 2024, company="Beta"),
+        row("c", "Acme FY23", 2023, company="Acme"),
+    ]
+    years, series = build_series(rows)
+    assert years == [2023, 2024]
+    by_name = {s.name: s for s in series}
+    assert [p["x"] for p in by_name["Acme"].revenue] == [2023, 2024]
+    assert [p["x"] for p in by_name["Beta"].revenue] == [2024]
+
+
+def test_build_series_keeps_currencies_apart():
+    rows = [row("a", "FY24", 2024, currency="INR"), row("b", "FY23", 2023, currency="usd")]
+    _, series = build_series(rows)
+    assert sorted(s.currency for s in series) == ["INR", "USD"]
+
+
+def test_build_series_notes_rows_it_cannot_merge():
+    rows = [
+        row("a", "FY24", 2024),
+        row("b", "FY24 again", 2024),
+        row("c", "Annual Report", None),
+        row("d", "FY22", 2022, unit="lots"),
+        CompareRow(report_id="e", label="FY21", error="boom"),
+    ]
+    years, series = build_series(rows)
+    assert years == [2024]
+    assert "Duplicate" in rows[1].note
+    assert "period" in rows[2].note
+    assert "unit" in rows[3].note
+    assert rows[4].note is None
+
+
+@pytest.mark.parametrize("name, key", [
+    ("Infosys Limited", "infosys"),
+    ("Infosys Ltd.", "infosys"),
+    ("INFOSYS", "infosys"),
+    ("The Tata Consultancy Services Ltd", "tata consultancy services"),
+    ("Larsen & Toubro Limited", "larsen and toubro"),
+    ("Apple Inc.", "apple"),
+    ("Company", "company"),
+])
+def test_company_key(name, key):
+    assert company_key(name) == key
+
+
+def test_build_series_groups_spellings_of_one_company():
+    rows = [
+        row("a", "FY23", 2023, company="Infosys Limited"),
+        row("b", "FY24", 2024, company="Infosys Ltd."),
+    ]
+    _, series = build_series(rows)
+    assert len(series) == 1
+    assert series[0].name == "Infosys Limited"
+    assert [p["x"] for p in series[0].revenue] == [2023, 2024]
+
+
+def test_eviction_is_reported_and_keeps_parsed_figures(monkeypatch):
+    from collections import OrderedDict
+
+    from backend import app as backend_app
+
+    monkeypatch.setattr(backend_app, "MAX_INDEXED_REPORTS", 2)
+    monkeypatch.setattr(backend_app, "reports", OrderedDict())
+    monkeypatch.setattr(backend_app, "extraction_cache", OrderedDict())
+    entry = lambda label: {"label": label, "company": None, "vectorstore": None, "qa_chain": None}
+
+    assert backend_app.register_report("a", entry("FY22")) == []
+    backend_app.cache_put(("a", backend_app.FIGURES_PROMPT), "figures")
+    backend_app.cache_put(("a", "free-form question"), "answer")
+    assert backend_app.register_report("b", entry("FY23")) == []
+
+    assert backend_app.register_report("c", entry("FY24")) == [{"report_id": "a", "label": "FY22"}]
+    assert list(backend_app.reports) == ["b", "c"]
+    assert backend_app.cache_get(("a", backend_app.FIGURES_PROMPT)) == "figures"
+    assert backend_app.cache_get(("a", "free-form question")) is None
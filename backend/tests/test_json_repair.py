@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from backend.json_repair import find_json_candidates, repair_json
+
+
+# ── repair_json ─────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1,}', {"a": 1}),
+    ('[1, 2, ]', [1, 2]),
+    ('{"a": [1, 2,],\n}', {"a": [1, 2]}),
+])
+def test_trailing_commas(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("{'a': 'b'}", {"a": "b"}),
+    ("{'summary': \"Company's year\"}", {"summary": "Company's year"}),
+    ("{'a': 'say \"hi\"'}", {"a": 'say "hi"'}),
+    ("{'a': 'it\\'s'}", {"a": "it's"}),
+    ("{'a': 'it's', 'b': 'the firm's own'}", {"a": "it's", "b": "the firm's own"}),
+])
+def test_single_quotes(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"y": 1,000,000}', {"y": 1000000}),
+    ('{"y": -355,170.5, "z": 2}', {"y": -355170.5, "z": 2}),
+    ('[{"x": "A", "y": 12,345}]', [{"x": "A", "y": 12345}]),
+    ('{"a": [1, 2, 3]}', {"a": [1, 2, 3]}),
+])
+def test_thousands_separators(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_string_contents_untouched():
+    text = '{"value": "INR 355,170 Million", "note": "a, ]"}'
+    assert repair_json(text) == text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("[100,200,300]", [100, 200, 300]),
+    ("{'values': [100,200,300]}", {"values": [100, 200, 300]}),
+    ('{"a": [1,234], "b": 5,}', {"a": [1, 234], "b": 5}),
+])
+def test_array_items_are_never_merged(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+@pytest.mark.parametrize("text", ["[1,000, 2,000]", "[1,000,2,000]"])
+def test_thousands_separators_inside_arrays_are_unsupported(text):
+    # Left alone rather than guessed at; the caller sees a parse failure
+    with pytest.raises(ValueError):
+        json.loads(repair_json(text))
+
+
+# ── find_json_candidates ────────────────────────────────────────────────────
+
+def test_fenced_block_is_yielded_before_surrounding_prose():
+    raw = 'Example: {"a": 0}\n```json\n{"a": 1}\n```'
+    assert next(find_json_candidates(raw)) == '{"a": 1}'
+
+
+def test_brackets_inside_strings_do_not_end_the_value():
+    raw = 'Result: {"label": "Revenue [FY24]", "value": "{n/a}"} done'
+    assert next(find_json_candidates(raw)) == '{"label": "Revenue [FY24]", "value": "{n/a}"}'
+
+
+def test_earlier_bracket_in_prose_is_yielded_first():
+    # Candidates are tried in order; schema validation in app.py skips [1]
+    candidates = list(find_json_candidates('Note [1]: {"a": 1}'))
+    assert candidates[0] == "[1]"
+    assert '{"a": 1}' in candidates
+
+
+def test_no_json():
+    assert list(find_json_candidates("I don't know.")) == []
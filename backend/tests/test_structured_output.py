@@ -0,0 +1,155 @@
+from typing import List
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from backend import app as backend_app
+from backend.app import (
+    KeyMetricsExtraction,
+    RecommendationData,
+    SegmentData,
+    StructuredOutputError,
+    parse_structured,
+    query_structured,
+)
+
+
+class StubChain:
+    """Stands in for the RetrievalQA chain: returns a fixed answer"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.queries = []
+
+    def invoke(self, inputs):
+        self.queries.append(inputs["query"])
+        return {"result": self.answer}
+
+
+class StubMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class StubLLM:
+    """Stands in for ChatOpenAI on the re-ask path"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return StubMessage(self.answer)
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    stats = {key: 0 for key in backend_app.json_stats}
+    monkeypatch.setattr(backend_app, "json_stats", stats)
+    return stats
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    stub = StubLLM("")
+    monkeypatch.setattr(backend_app, "get_llm", lambda: stub)
+    return stub
+
+
+RECOMMENDATION = {"summary": "up", "key_points": ["a"], "risks": ["b"], "outlook": "good"}
+
+
+# ── parse_structured ────────────────────────────────────────────────────────
+
+def test_fenced_answer():
+    raw = 'Here you go:\n```json\n[{"x": "Cloud", "y": 1,000},]\n```'
+    assert parse_structured(raw, List[SegmentData]) == [SegmentData(x="Cloud", y=1000)]
+
+
+def test_prose_wrapped_single_quoted_answer():
+    raw = "Sure! {'summary': 'up', 'key_points': ['a',], 'risks': ['b'], 'outlook': 'good'} Hope that helps."
+    assert parse_structured(raw, RecommendationData) == RecommendationData(**RECOMMENDATION)
+
+
+def test_schema_picks_the_matching_candidate():
+    # "[1]" and the nested key_points list come first but don't fit the schema
+    raw = 'See note [1]: {"summary": "up", "key_points": ["a"], "risks": ["b"], "outlook": "good"}'
+    assert parse_structured(raw, RecommendationData) == RecommendationData(**RECOMMENDATION)
+
+
+def test_counts_clean_and_repaired(fresh_stats):
+    parse_structured('{"x": "A", "y": 1}', SegmentData)
+    parse_structured("{'x': 'A', 'y': 1,}", SegmentData)
+    assert fresh_stats == {"responses": 2, "clean": 1, "repaired": 1, "reasked": 0, "failed": 0}
+
+
+def test_failure_is_counted_and_raised(fresh_stats):
+    with pytest.raises(StructuredOutputError):
+        parse_structured("I don't know.", SegmentData)
+    assert fresh_stats["responses"] == 1
+    assert fresh_stats["failed"] == 1
+
+
+# ── query_structured ────────────────────────────────────────────────────────
+
+def test_valid_answer_needs_no_reask(fresh_stats, llm):
+    chain = StubChain('{"x": "A", "y": 2}')
+    assert query_structured(chain, "prompt", SegmentData) == SegmentData(x="A", y=2)
+    assert chain.queries == ["prompt"]
+    assert llm.prompts == []
+    assert fresh_stats["clean"] == 1
+
+
+def test_reask_disabled_raises_without_calling_the_llm(fresh_stats, llm):
+    with pytest.raises(StructuredOutputError):
+        query_structured(StubChain("no idea"), "prompt", SegmentData, reask=False)
+    assert llm.prompts == []
+    assert fresh_stats == {"responses": 1, "clean": 0, "repaired": 0, "reasked": 0, "failed": 1}
+
+
+def test_reask_repairs_the_answer(fresh_stats, llm):
+    llm.answer = '```json\n{"x": "A", "y": 3}\n```'
+    assert query_structured(StubChain('{"x": "A"}'), "prompt", SegmentData) == SegmentData(x="A", y=3)
+    assert len(llm.prompts) == 1
+    # The re-ask carries the bad output and the schema, not the retrieval context
+    assert '{"x": "A"}' in llm.prompts[0]
+    assert '"properties"' in llm.prompts[0]
+    assert fresh_stats == {"responses": 1, "clean": 0, "repaired": 0, "reasked": 1, "failed": 0}
+
+
+def test_failed_reask_raises(fresh_stats, llm):
+    llm.answer = "still not JSON"
+    with pytest.raises(StructuredOutputError):
+        query_structured(StubChain("nope"), "prompt", SegmentData)
+    assert fresh_stats["reasked"] == 0
+    assert fresh_stats["failed"] == 1
+
+
+# ── PartialExtraction ───────────────────────────────────────────────────────
+
+def test_partial_extraction_coerces_numbers():
+    data = parse_structured('{"eps": 151.6, "roe": "25.0%"}', KeyMetricsExtraction)
+    assert data.model_dump(exclude_none=True) == {"eps": "151.6", "roe": "25.0%"}
+
+
+@pytest.mark.parametrize("raw", ["{}", '{"unrelated": 1}'])
+def test_partial_extraction_needs_at_least_one_field(raw):
+    with pytest.raises(StructuredOutputError):
+        parse_structured(raw, KeyMetricsExtraction)
+
+
+def test_key_metrics_merges_over_defaults(monkeypatch, llm):
+    monkeypatch.setattr(backend_app, "qa_chain", StubChain('{"eps": 151.6}'))
+    metrics = backend_app.get_key_metrics()
+    assert metrics.eps == "151.6"
+    assert metrics.revenue == "INR 355,170 Million"
+    assert llm.prompts == []
+
+
+def test_financial_metrics_falls_back_without_reask(monkeypatch, llm):
+    monkeypatch.setattr(backend_app, "qa_chain", StubChain("I don't know."))
+    metrics = backend_app.get_financial_metrics()
+    assert metrics.basic_eps == "INR 151.60"
+    assert llm.prompts == []